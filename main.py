@@ -5,128 +5,623 @@ import tkinter as tk
 from tkinter import filedialog
 from tkinter.scrolledtext import ScrolledText
 import tempfile
-import graphviz
+import shutil
+import hashlib
+import tarfile
+import urllib.request
+import urllib.error
+import urllib.parse
+import http.client
 import sys
-import glob
+import io
 import tqdm
+import threading
+import queue
+import functools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Constant to name the temporary folder
 TMP_FOLDER_NAME = "temp"
 
-def extract_source_info(line):
-    """
-    Extracts the source information from a Terraform code line.
-    Returns a tuple containing the URL, PATH, and TAG components, or None if no match is found.
-    """
-    match = re.search(r'source\s*=\s*"(.+)"', line)
-    if match:
-        source_info = match.group(1)
-        match = re.search(r'git::(.+)//(.+)\?ref=(.+)', source_info)
-        if match:
-            return match.group(1), match.group(2), match.group(3)
-    return None
+# Thread pool used to clone dependencies concurrently. Cloning is bound by network
+# and git subprocess waits, so more threads than cores pays off.
+_CLONE_POOL = ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4))
+
+# Interval in which the GUI polls for log output and finished analyses
+LOG_POLL_INTERVAL_MS = 50
+
+# Number of Terraform files analyzed concurrently by analyze_directory
+ANALYZE_DIRECTORY_WORKERS = 8
+
+# Downloaded repositories by (url, tag) for clones and (url, path, tag) for archives,
+# so each repository is fetched only once per run. None for failed downloads, until the next analysis.
+_CLONE_CACHE = {}
+_CLONE_CACHE_LOCK = threading.Lock()
+_CLONE_KEY_LOCKS = {}
+
+# Matches a Git module source like 'source = "git::<url>//<path>?ref=<tag>"'
+_SOURCE_RE = re.compile(rb'source\s*=\s*"git::([^"\n]+)//([^"?\n]+)\?ref=([^"\n]+)"')
+
+# Hosts serving tarballs of a single commit, by host name of the Git URL
+_ARCHIVE_URLS = {
+    "github.com": "https://codeload.github.com/{repo}/tar.gz/{tag}",
+    "gitlab.com": "https://gitlab.com/{repo}/-/archive/{tag}/{name}-{tag}.tar.gz",
+}
+# Hosts serving single files of a commit, by host name of the Git URL
+_RAW_FILE_URLS = {
+    "github.com": "https://raw.githubusercontent.com/{repo}/{tag}/{file_path}",
+    "gitlab.com": "https://gitlab.com/{repo}/-/raw/{tag}/{file_path}",
+}
+_GIT_URL_RE = re.compile(r'^(?:ssh://|https://)?(?:git@)?([^/:]+)[:/](.+?)(?:\.git)?/?$')
+
+# Git URLs for which no archive could be downloaded, e.g. private repositories or servers refusing
+# 'git archive --remote', so they are cloned right away
+_NO_ARCHIVE_URLS = set()
+
+# Dependencies of already analyzed modules by (url, path, tag)
+_MODULE_DEPENDENCIES = {}
 
 def get_dependencies(file_path):
     """
     Extracts all dependencies from a Terraform code file.
     Returns a list of tuples containing the URL, PATH, and TAG components of each dependency.
     """
-    with open(file_path, 'r') as f:
-        lines = f.readlines()
-
-    dependencies = []
-    for line in lines:
-        source_info = extract_source_info(line)
-        if source_info:
-            dependencies.append(source_info)
-
-    return dependencies
+    # Scanned as bytes, so files in any encoding can be parsed without decoding them as a whole
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    return [
+        tuple(group.decode(errors="replace") for group in match.groups())
+        for match in _SOURCE_RE.finditer(data)
+    ]
     
-def clone_git_repo(git_ssh_url, git_tag, temp_folder):
+def clone_git_repo(git_ssh_url, git_tag, temp_folder, sparse_path=None):
     """
     Clones a Git repository to a temporary folder.
+    If sparse_path is given, only the files below this path are downloaded and checked out.
+    Clones are kept in the temp folder and reused by later runs.
     Returns the path to the cloned repository or None if the cloning fails.
     """
-    tmp_dir = tempfile.mkdtemp(dir=temp_folder)
+    repo_dir = get_clone_folder_path(temp_folder, git_ssh_url, git_tag)
+    if not os.path.isdir(repo_dir):
+        # Clone into a separate folder first, so an interrupted clone is never reused
+        tmp_dir = tempfile.mkdtemp(dir=temp_folder)
+
+        # Protocol v2 lets the server advertise only the requested ref instead of all refs.
+        # The clones are only read, so automatic garbage collection would only cost time.
+        cmd = ['git', '-c', 'protocol.version=2', '-c', 'gc.auto=0', 'clone', '--quiet', '--single-branch',
+               '-b', git_tag, '--depth', '1']
+        if sparse_path:
+            # Fetch blobs lazily, so only the blobs of the sparse checkout are downloaded
+            cmd += ['--filter=blob:none', '--sparse']
+        cmd += [git_ssh_url, tmp_dir]
+        try:
+            run_git(cmd)
+        except (subprocess.CalledProcessError, OSError):
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return None
+
+        try:
+            os.rename(tmp_dir, repo_dir)
+        except OSError:
+            # Cloned by another run in the meantime
+            shutil.rmtree(tmp_dir, ignore_errors=True)
 
-    cmd = ['git', 'clone', '--quiet', '-b', git_tag, '--depth', '1', git_ssh_url, tmp_dir]
     try:
-        subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
-        return tmp_dir
+        if sparse_path and not os.path.isdir(os.path.join(repo_dir, sparse_path)):
+            add_sparse_checkout_path(repo_dir, sparse_path)
+        return repo_dir
+    except (subprocess.CalledProcessError, OSError):
+        return None
+
+def get_cache_folder_path(temp_folder, cache_key):
+    """
+    Returns the path of the folder inside the temp folder in which the download for a cache key is kept.
+    """
+    return os.path.join(temp_folder, hashlib.sha256(cache_key.encode()).hexdigest()[:16])
+
+def get_clone_folder_path(temp_folder, git_ssh_url, git_tag):
+    """
+    Returns the path of the folder inside the temp folder in which the clone of a repository at a tag
+    is kept.
+    """
+    return get_cache_folder_path(temp_folder, f"{git_ssh_url}@{git_tag}")
+
+def add_sparse_checkout_path(repo_path, sparse_path):
+    """
+    Adds a path to the sparse checkout of a cloned repository.
+    Nothing is added to a clone with all files checked out, see fetch_full_repository.
+    Raises subprocess.CalledProcessError if git fails, or OSError if git cannot be run.
+    """
+    try:
+        run_git(['git', '-C', repo_path, 'sparse-checkout', 'add', sparse_path])
     except subprocess.CalledProcessError:
-        print(f"[ERROR] - Failed to clone repository: {git_ssh_url}")
+        if is_sparse_checkout(repo_path):
+            raise
+
+def is_sparse_checkout(repo_path):
+    """
+    Returns whether only some files of a cloned repository are checked out.
+    """
+    result = subprocess.run(
+        ['git', '-C', repo_path, 'config', '--type=bool', 'core.sparseCheckout'],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, env=get_git_env(), text=True,
+    )
+    return result.stdout.strip() == "true"
+
+def run_git(cmd):
+    """
+    Runs a git command without output.
+    Credential prompts are disabled (see get_git_env), so a repository needing a password fails right away
+    instead of blocking a worker thread on a prompt nobody can answer.
+    Raises subprocess.CalledProcessError if git fails, or OSError if git cannot be run.
+    """
+    subprocess.run(
+        cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=get_git_env(), check=True
+    )
+
+def get_git_env():
+    """
+    Returns the environment for git commands, with credential prompts disabled.
+    """
+    return dict(os.environ, GIT_TERMINAL_PROMPT="0")
+
+def get_archive_url(git_ssh_url, git_tag):
+    """
+    Converts a Git URL of a known hosting service into the URL of a tarball of the given tag.
+    Returns None if the host does not serve archives.
+    """
+    match = _GIT_URL_RE.match(git_ssh_url)
+    if not match or match.group(1) not in _ARCHIVE_URLS:
+        return None
+    repo = urllib.parse.quote(match.group(2), safe="/")
+    return _ARCHIVE_URLS[match.group(1)].format(
+        repo=repo, name=repo.rsplit("/", 1)[-1], tag=urllib.parse.quote(git_tag, safe="/")
+    )
+
+def get_raw_file_url(git_ssh_url, git_tag, file_path):
+    """
+    Converts a Git URL of a known hosting service into the URL of a single file at the given tag.
+    Returns None if the host does not serve single files.
+    """
+    match = _GIT_URL_RE.match(git_ssh_url)
+    if not match or match.group(1) not in _RAW_FILE_URLS:
+        return None
+    # Module paths and tags may contain spaces or non-ASCII characters, which are not allowed in URLs
+    return _RAW_FILE_URLS[match.group(1)].format(
+        repo=urllib.parse.quote(match.group(2), safe="/"),
+        tag=urllib.parse.quote(git_tag, safe="/"),
+        file_path=urllib.parse.quote(file_path, safe="/"),
+    )
+
+def download_raw_file(git_ssh_url, path, git_tag, target_dir):
+    """
+    Downloads only the Terraform file (main.tf or terragrunt.hcl) of a module from a hosting service
+    serving single files, which takes a single small HTTPS request for public repositories.
+    Returns whether a file was downloaded.
+    """
+    path_parts = [part for part in path.split("/") if part]
+    if ".." in path_parts:
+        return False
+    folder_path = "/".join(path_parts)
+    for file_name in ("main.tf", "terragrunt.hcl"):
+        raw_file_url = get_raw_file_url(git_ssh_url, git_tag, f"{folder_path}/{file_name}")
+        if not raw_file_url:
+            return False
+        try:
+            with urllib.request.urlopen(raw_file_url, timeout=30) as response:
+                if response.geturl() != raw_file_url:
+                    # Redirected, e.g. to the login page of a private project, not a Terraform file
+                    return False
+                content = response.read()
+        except urllib.error.HTTPError as error:
+            if error.code == 404:
+                # Try the next file name, private repositories also answer with 404
+                continue
+            return False
+        except (urllib.error.URLError, http.client.HTTPException, ValueError, OSError):
+            return False
+
+        os.makedirs(os.path.join(target_dir, folder_path), exist_ok=True)
+        with open(os.path.join(target_dir, folder_path, file_name), 'wb') as f:
+            f.write(content)
+        return True
+    return False
+
+def extract_path_from_tar(fileobj, path, target_dir, strip_top_folder):
+    """
+    Streams a tar archive and extracts only the regular files and folders below the given path.
+    strip_top_folder drops the first path component of all entries, for archives wrapping the repository
+    in a single top level folder.
+    Returns whether any entry was extracted.
+    """
+    path_parts = [part for part in path.split("/") if part]
+    extracted = False
+    with tarfile.open(fileobj=fileobj, mode="r|*") as archive:
+        for member in archive:
+            parts = member.name.split("/")[1 if strip_top_folder else 0:]
+            if parts[:len(path_parts)] != path_parts or ".." in parts:
+                continue
+            if not (member.isfile() or member.isdir()):
+                continue
+            member.name = "/".join(parts)
+            archive.extract(member, target_dir)
+            extracted = True
+    return extracted
+
+def extract_remote_git_archive(git_ssh_url, path, git_tag, target_dir):
+    """
+    Fetches only the given path of a tag with 'git archive --remote' and extracts it.
+    This needs the server to allow git-upload-archive, which e.g. plain SSH remotes and self-hosted
+    GitLab do, but GitHub does not.
+    Returns whether any entry was extracted.
+    """
+    cmd = ['git', 'archive', f'--remote={git_ssh_url}', '--format=tar', git_tag, path]
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, env=get_git_env())
+    try:
+        extracted = extract_path_from_tar(process.stdout, path, target_dir, strip_top_folder=False)
+    finally:
+        process.stdout.close()
+        return_code = process.wait()
+    return extracted and return_code == 0
+
+def download_archive(git_ssh_url, path, git_tag, temp_folder):
+    """
+    Downloads an archive of a tag and extracts only the entries below the given path.
+    From GitHub and GitLab only the Terraform file is downloaded via HTTPS, falling back to the tarball.
+    Other hosts are asked with 'git archive --remote'.
+    Extracted archives are kept in the temp folder and reused by later runs.
+    Returns the path to the extracted repository root or None if the download fails.
+    """
+    if git_ssh_url in _NO_ARCHIVE_URLS:
+        return None
+    archive_url = get_archive_url(git_ssh_url, git_tag)
+
+    cache_dir = get_cache_folder_path(temp_folder, f"{git_ssh_url}@{git_tag}//{path}")
+    if os.path.isdir(cache_dir):
+        return cache_dir
+
+    # Extract into a separate folder first, so an interrupted download is never reused
+    tmp_dir = tempfile.mkdtemp(dir=temp_folder)
+    try:
+        if download_raw_file(git_ssh_url, path, git_tag, tmp_dir):
+            extracted = True
+        elif archive_url:
+            with urllib.request.urlopen(archive_url, timeout=30) as response:
+                # Tarballs contain a single top level folder named after the repository and tag
+                extracted = extract_path_from_tar(response, path, tmp_dir, strip_top_folder=True)
+        else:
+            extracted = extract_remote_git_archive(git_ssh_url, path, git_tag, tmp_dir)
+    except (urllib.error.URLError, http.client.HTTPException, tarfile.TarError, ValueError, OSError):
+        extracted = False
+
+    if not extracted:
+        # Most likely the repository is private or the server does not allow archives, so do not ask again
+        _NO_ARCHIVE_URLS.add(git_ssh_url)
+        shutil.rmtree(tmp_dir, ignore_errors=True)
         return None
 
+    try:
+        os.rename(tmp_dir, cache_dir)
+    except OSError:
+        # Extracted by another run in the meantime
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return cache_dir
+
+def _get_key_lock(key):
+    """
+    Returns the lock which serializes fetching the repository of a cache key.
+    """
+    with _CLONE_CACHE_LOCK:
+        return _CLONE_KEY_LOCKS.setdefault(key, threading.Lock())
+
+def _cached_fetch(key, fetch, *args):
+    """
+    Calls fetch only once per key. Concurrent calls for the same key wait for the first call to finish.
+    """
+    with _get_key_lock(key):
+        if key not in _CLONE_CACHE:
+            _CLONE_CACHE[key] = fetch(*args)
+        return _CLONE_CACHE[key]
+
+def forget_failed_fetches():
+    """
+    Forgets failed downloads, so the next analysis tries them again instead of failing right away.
+    Failures are only remembered during an analysis, they may be caused by a temporary network problem.
+    """
+    with _CLONE_CACHE_LOCK:
+        for key in [key for key, repo_path in _CLONE_CACHE.items() if repo_path is None]:
+            del _CLONE_CACHE[key]
+        _NO_ARCHIVE_URLS.clear()
+
+def cached_clone_git_repo(git_ssh_url, git_tag, temp_folder, sparse_path=None):
+    """
+    Clones a Git repository like clone_git_repo, but only once per URL and tag.
+    Further sparse paths of an already cloned repository are added to its sparse checkout.
+    """
+    key = (git_ssh_url, git_tag)
+    with _get_key_lock(key):
+        if key not in _CLONE_CACHE:
+            _CLONE_CACHE[key] = clone_git_repo(git_ssh_url, git_tag, temp_folder, sparse_path)
+        elif _CLONE_CACHE[key] and sparse_path:
+            repo_path = _CLONE_CACHE[key]
+            if os.path.isdir(os.path.join(repo_path, sparse_path)):
+                return repo_path
+            try:
+                add_sparse_checkout_path(repo_path, sparse_path)
+            except (subprocess.CalledProcessError, OSError):
+                return None
+        return _CLONE_CACHE[key]
+
+def fetch_dependency(git_ssh_url, path, git_tag, temp_folder):
+    """
+    Fetches the repository of a dependency. Only the given path is downloaded if the host serves
+    archives, otherwise the repository is cloned.
+    Returns the path to the repository root or None if fetching fails.
+    """
+    if os.path.isdir(get_clone_folder_path(temp_folder, git_ssh_url, git_tag)):
+        # Cloned by an earlier run, so do not ask the server for an archive again
+        return cached_clone_git_repo(git_ssh_url, git_tag, temp_folder, path)
+    repo_path = _cached_fetch(
+        (git_ssh_url, path, git_tag), download_archive, git_ssh_url, path, git_tag, temp_folder
+    )
+    return repo_path or cached_clone_git_repo(git_ssh_url, git_tag, temp_folder, path)
+
+def fetch_full_repository(git_ssh_url, git_tag, temp_folder):
+    """
+    Fetches a repository with all files checked out, for modules which are not found at their path.
+    A sparse clone is extended to the whole repository.
+    Returns the path to the repository root or None if fetching fails.
+    """
+    repo_path = cached_clone_git_repo(git_ssh_url, git_tag, temp_folder)
+    if not repo_path:
+        return None
+    with _get_key_lock((git_ssh_url, git_tag)):
+        try:
+            run_git(['git', '-C', repo_path, 'sparse-checkout', 'disable'])
+        except (subprocess.CalledProcessError, OSError):
+            return None
+    return repo_path
+
 def find_folder_path(directory, folder_name):
     """
     Searches for a folder with a given name inside a directory and its subdirectories.
     Returns the path of the first matching folder found, or None if no folder is found.
     """
-    for root, dirs, _ in os.walk(directory):
-        if folder_name in dirs:
-            return os.path.join(root, folder_name)
+    # Module paths are usually relative to the repository root
+    direct_path = os.path.join(directory, folder_name)
+    if os.path.isdir(direct_path):
+        return direct_path
+
+    # Breadth-first, so the match closest to the repository root is found first
+    pending = deque([directory])
+    while pending:
+        with os.scandir(pending.popleft()) as entries:
+            for entry in entries:
+                if not entry.is_dir() or entry.name == ".git":
+                    continue
+                if entry.name == folder_name:
+                    return entry.path
+                if not entry.is_symlink():
+                    pending.append(entry.path)
     return None
 
 def get_dependent_file_path(dependent_folder_path):
     """
     Searches for a Terraform file (main.tf or terragrunt.hcl) inside a folder and returns its path.
-    If no Terraform file is found, prints a warning message and returns None.
+    Returns None if no Terraform file is found.
     """
-    main_path = os.path.join(dependent_folder_path, "main.tf")
-    terragrunt_path = os.path.join(dependent_folder_path, "terragrunt.hcl")
-
-    if os.path.isfile(main_path):
-        return main_path
-    elif os.path.isfile(terragrunt_path):
-        return terragrunt_path
+    # A single directory read instead of one stat per candidate file
+    with os.scandir(dependent_folder_path) as entries:
+        file_names = {entry.name for entry in entries if entry.is_file()}
+
+    if "main.tf" in file_names:
+        return os.path.join(dependent_folder_path, "main.tf")
+    elif "terragrunt.hcl" in file_names:
+        return os.path.join(dependent_folder_path, "terragrunt.hcl")
     else:
-        print("[WARNING] - No main.tf or terragrunt.hcl file was found")
         return None
 
-def add_no_dependencies_node(file_name, graph):
+def advise_will_need(file_path):
     """
-    Adds a 'no further dependencies' node to the graph.
+    Asks the OS to read a file into the page cache ahead of parsing it, where posix_fadvise is available.
     """
-    graph.node("No further dependencies")
-    graph.edge(file_name, "No further dependencies")
+    if not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        fd = os.open(file_path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        finally:
+            os.close(fd)
+    except OSError:
+        pass
 
+def fetch_dependency_file(git_ssh_url, path, git_tag, temp_folder):
+    """
+    Fetches the repository of a dependency and locates its Terraform file, which is read ahead so it
+    is cached by the time it gets parsed. Runs in the clone thread pool.
+    Returns a tuple of the repository root, module folder and Terraform file paths. The entries after a
+    failed step are None, all of them if fetching raises, e.g. as the temp folder cannot be written
+    or read.
+    """
+    try:
+        repo_path = fetch_dependency(git_ssh_url, path, git_tag, temp_folder)
+        folder_path = find_folder_path(repo_path, path) if repo_path else None
+        if repo_path and not folder_path:
+            # Only the module path was downloaded, search the whole repository for a folder with its name
+            full_repo_path = fetch_full_repository(git_ssh_url, git_tag, temp_folder)
+            if full_repo_path:
+                repo_path = full_repo_path
+                folder_path = find_folder_path(repo_path, path)
+        file_path = get_dependent_file_path(folder_path) if folder_path else None
+    except (urllib.error.URLError, http.client.HTTPException, tarfile.TarError, ValueError, OSError):
+        return None, None, None
+    if file_path:
+        advise_will_need(file_path)
+    return repo_path, folder_path, file_path
 
-def display_dependency_tree(file_path):
+def get_temp_folder():
     """
-    Computes the dependency tree of a Terraform file.
-    Returns a dictionary with a nested structure that represents the dependency tree.
+    Returns the path of the temporary folder for downloaded dependencies and creates it if necessary.
     """
     temp_folder = os.path.join(os.getcwd(), TMP_FOLDER_NAME)
-    if not os.path.isdir(temp_folder):
-        os.mkdir(temp_folder)
+    os.makedirs(temp_folder, exist_ok=True)
+    return temp_folder
 
-    dependencies = get_dependencies(file_path)
-    if not dependencies:
-        return None
+def prefetch_dependencies(file_dependencies, temp_folder):
+    """
+    Starts fetching the direct dependencies of Terraform files in the clone thread pool, given as a list
+    of dependencies per file. Dependencies shared by several files are fetched only once, later lookups
+    are served from the cache.
+    """
+    unique_dependencies = set()
+    for dependencies in file_dependencies:
+        unique_dependencies.update(dependencies)
 
-    dependency_tree = {}
-    for dependency in dependencies:
-        url, path, tag = dependency
-        dependent_repo_path = clone_git_repo(url, tag, temp_folder)
-        
-        if dependent_repo_path:
-            dependent_folder_path = find_folder_path(dependent_repo_path, path)
-
-            if dependent_folder_path:
-                dependent_file_path = get_dependent_file_path(dependent_folder_path)
-                if dependent_file_path:
-                    sub_dependency_tree = display_dependency_tree(dependent_file_path)
-                    if sub_dependency_tree:
-                        dependency_tree[dependency] = sub_dependency_tree
-                    else:
-                        dependency_tree[dependency] = {}
-                else:
-                    dependency_tree[dependency] =  {"ERROR DOWNLOADING": ""}
-        else:
-            dependency_tree[dependency] = {"ERROR DOWNLOADING": ""}
+    for url, path, tag in unique_dependencies:
+        _CLONE_POOL.submit(fetch_dependency, url, path, tag, temp_folder)
 
+def get_dependency_name(dependency):
+    """
+    Returns the name of a dependency tuple as shown in the logs and the graph.
+    Replaces colons with forward slashes to allow for better visualization of Git repository URLs.
+    """
+    return ' // '.join(dependency).replace(":", "/")
+
+def display_dependency_tree(file_path, temp_folder=None):
+    """
+    Computes the dependency tree of a Terraform file, see get_dependency_tree.
+    The messages about modules which could not be analyzed are printed.
+    Returns the list of nodes or None if the file has no dependencies.
+    """
+    dependency_tree, messages = get_dependency_tree(get_dependencies(file_path), temp_folder)
+    for message in messages:
+        print(message)
     return dependency_tree
 
+def get_dependency_tree(dependencies, temp_folder=None):
+    """
+    Computes the dependency tree of the dependencies of a Terraform file.
+    All modules reachable from the file are analyzed level by level first, so the dependencies of all
+    modules on the same depth are fetched concurrently and each module is fetched and parsed only once.
+    The tree is built from their dependencies afterwards.
+    temp_folder is the folder dependencies are downloaded to, by default the one of get_temp_folder.
+    Returns a list with a node per dependency, which is a dictionary with a 'name' key and a 'children' key
+    holding the nodes of its own dependencies, or None if the file has no dependencies. It is returned
+    together with the messages about modules which could not be analyzed, to be printed with the file
+    they belong to.
+    """
+    temp_folder = temp_folder or get_temp_folder()
+
+    if not dependencies:
+        return None, []
+
+    # Dependencies of all modules reachable from the file, None for modules which could not be analyzed
+    module_dependencies = {}
+    messages = []
+    level = dict.fromkeys(dependencies)
+
+    while level:
+        futures = {}
+        for dependency in level:
+            cached_dependencies = _MODULE_DEPENDENCIES.get(dependency)
+            if cached_dependencies is not None:
+                # Analyzed before, so neither fetch nor parse it again
+                module_dependencies[dependency] = cached_dependencies
+                continue
+            url, path, tag = dependency
+            futures[_CLONE_POOL.submit(fetch_dependency_file, url, path, tag, temp_folder)] = dependency
+
+        for future in as_completed(futures):
+            dependency = futures[future]
+            url, path, tag = dependency
+            dependent_repo_path, dependent_folder_path, dependent_file_path = future.result()
+
+            if not dependent_repo_path:
+                messages.append(f"[ERROR] - Failed to clone repository: {url}")
+                module_dependencies[dependency] = None
+                continue
+
+            if not dependent_folder_path:
+                messages.append(f"[WARNING] - Folder '{path}' was not found in repository: {url}")
+                module_dependencies[dependency] = None
+                continue
+
+            if not dependent_file_path:
+                messages.append("[WARNING] - No main.tf or terragrunt.hcl file was found")
+                module_dependencies[dependency] = None
+                continue
+
+            file_dependencies = get_dependencies(dependent_file_path)
+            module_dependencies[dependency] = _MODULE_DEPENDENCIES[dependency] = file_dependencies
+
+        # Modules which are reached for the first time on the next depth
+        level = dict.fromkeys(
+            child
+            for dependency in level
+            for child in module_dependencies[dependency] or []
+            if child not in module_dependencies
+        )
+
+    return build_dependency_nodes(dependencies, module_dependencies), messages
+
+def build_dependency_nodes(dependencies, module_dependencies):
+    """
+    Builds the nodes of the dependencies of a file from the dependencies of the analyzed modules.
+    A dependency which is already on the path from the analyzed file is marked as cycle instead of being
+    expanded again. The node of a module is built once and shared by all its parents, unless a cycle was
+    cut below it, as its children then depend on the path from the analyzed file.
+    Returns the list of nodes.
+    """
+    root_nodes = []
+    shared_nodes = {}
+    # Modules on the path from the analyzed file, which are being expanded
+    ancestors = set()
+    # Depth-first, a frame per module being expanded: the module, its node, its dependencies which are not
+    # built yet, and whether a cycle was cut below it
+    stack = [[None, {'children': root_nodes}, iter(dict.fromkeys(dependencies)), False]]
+    while stack:
+        frame = stack[-1]
+        parent_dependency, parent_node, pending_dependencies, _ = frame
+        # Duplicate declarations in a file are shown once, in the order of their first declaration
+        dependency = next(pending_dependencies, None)
+
+        if dependency is None:
+            # All children of the module are built
+            stack.pop()
+            if parent_dependency is not None:
+                ancestors.remove(parent_dependency)
+                if frame[3]:
+                    stack[-1][3] = True
+                else:
+                    shared_nodes[parent_dependency] = parent_node
+            continue
+
+        node = shared_nodes.get(dependency)
+        if node is not None:
+            parent_node['children'].append(node)
+            continue
+
+        name = get_dependency_name(dependency)
+        if dependency in ancestors:
+            parent_node['children'].append({'name': name, 'children': [{'name': "CYCLE DETECTED"}]})
+            frame[3] = True
+            continue
+
+        children = module_dependencies[dependency]
+        if children is None:
+            node = {'name': name, 'children': [{'name': "ERROR DOWNLOADING"}]}
+            shared_nodes[dependency] = node
+            parent_node['children'].append(node)
+            continue
+
+        node = {'name': name, 'children': []}
+        parent_node['children'].append(node)
+        ancestors.add(dependency)
+        stack.append([dependency, node, iter(dict.fromkeys(children)), False])
+
+    return root_nodes
 
 def browse_file_path():
     """
@@ -140,6 +635,28 @@ def browse_file_path():
         analyze_file()
 
 
+def find_terraform_files(directory_path):
+    """
+    Searches a directory and its subdirectories for Terraform files (main.tf or terragrunt.hcl).
+    Hidden folders like .git or .terraform and the temporary folder of the downloaded dependencies are
+    skipped.
+    Returns a list of the found file paths.
+    """
+    temp_folder = os.path.realpath(os.path.join(os.getcwd(), TMP_FOLDER_NAME))
+    terraform_files = []
+    for root, dirs, files in os.walk(directory_path):
+        # Prune in place, so os.walk does not descend into these folders at all
+        dirs[:] = [
+            d for d in dirs
+            if not d.startswith('.')
+            and not (d == TMP_FOLDER_NAME and os.path.realpath(os.path.join(root, d)) == temp_folder)
+        ]
+        for file_name in files:
+            if file_name == 'main.tf' or file_name == 'terragrunt.hcl':
+                terraform_files.append(os.path.join(root, file_name))
+    return terraform_files
+
+
 def analyze_directory():
     """
     Analyzes a directory and visualizes the dependency tree for each Terraform file in its subdirectories.
@@ -150,149 +667,140 @@ def analyze_directory():
     if not directory_path:
         return
 
-    tf_files = glob.glob(os.path.join(directory_path, '**', 'main.tf'), recursive=True)
-    hcl_files = glob.glob(os.path.join(directory_path, '**', 'terragrunt.hcl'), recursive=True)
-    all_files = tf_files + hcl_files
+    def _worker():
+        all_files = find_terraform_files(directory_path)
 
-    if not all_files:
-        print("No .tf or .hcl files found in the selected directory.")
-        return
+        if not all_files:
+            print("No .tf or .hcl files found in the selected directory.")
+            return
 
-    # Create a single graph for all the files
-    main_graph = graphviz.Digraph()
+        # Create a single graph for all the files
+        main_graph = DotGraph()
 
-    for file_path in tqdm.tqdm(all_files, "Analyzing files ..."):
-        print(f"Analyzing file: {file_path}")
-        dependency_tree = display_dependency_tree(file_path)
+        # Fetch the dependencies of all files up front, so each shared repository is downloaded once
+        temp_folder = get_temp_folder()
+        all_dependencies = [get_dependencies(file_path) for file_path in all_files]
+        prefetch_dependencies(all_dependencies, temp_folder)
 
-        if dependency_tree is None:
-            print(f"No dependencies found for file: {file_path}")
-            continue
+        # Compute the dependency trees of all files concurrently, the graph is assembled serially below
+        with ThreadPoolExecutor(max_workers=ANALYZE_DIRECTORY_WORKERS) as executor:
+            analyze = functools.partial(get_dependency_tree, temp_folder=temp_folder)
+            dependency_trees = list(tqdm.tqdm(
+                executor.map(analyze, all_dependencies), "Analyzing files ...", total=len(all_files)
+            ))
 
-        dir_name = os.path.dirname(file_path).replace(":", "")
+        for file_path, (dependency_tree, messages) in zip(all_files, dependency_trees):
+            print(f"Analyzing file: {file_path}")
+            for message in messages:
+                print(message)
 
-        dependency_tree_str = transform_dict_keys(dependency_tree)
-        dependency_tree_str = {dir_name: dependency_tree_str}
-        tree = dict_to_tree(dependency_tree_str)
+            if dependency_tree is None:
+                print(f"No dependencies found for file: {file_path}")
+                continue
 
-        # Add the nodes and edges for the current file to the main graph
-        visualize_tree(tree, main_graph)
+            dir_name = os.path.dirname(file_path).replace(":", "")
+            tree = {'name': dir_name, 'children': dependency_tree}
 
-        # Print dependency tree to console
-        print()
-        if dependency_tree:
-            print_dependency_tree({dir_name: dependency_tree})
-        else:
-            print(f"{dir_name}\n  No dependencies found")
+            # Add the nodes and edges for the current file to the main graph
+            visualize_tree(tree, main_graph)
 
-        print()
-        print("=" * 80)
+            # Print dependency tree to console
+            print()
+            if dependency_tree:
+                print_dependency_tree(tree)
+            else:
+                print(f"{dir_name}\n  No dependencies found")
+
+            print()
+            print("=" * 80)
+
+        # Render the main graph containing all the dependency trees
+        main_graph.render("dependency_tree", format="png")
 
-    # Render the main graph containing all the dependency trees
-    main_graph.render("dependency_tree", format="png")
+        print("FINISHED")
 
-    print("FINISHED")
+    run_in_background(_worker)
 
 
-def transform_dict_keys(data):
+def _dot_id(name):
     """
-    Transforms all the keys of a nested dictionary from tuples to strings.
-    Replaces colons with forward slashes to allow for better visualization of Git repository URLs.
+    Quotes a name for use as a node ID in the DOT language.
     """
-    if isinstance(data, dict):
-        new_dict = {}
-        for key, value in data.items():
-            if isinstance(key, tuple):
-                new_key = ' // '.join(str(x) for x in key)
-                new_key = new_key.replace(":", "/")
-            else:
-                new_key = key
-            new_dict[new_key] = transform_dict_keys(value)
-        return new_dict
-    elif isinstance(data, list): 
-        new_list = []
-        for item in data:
-            new_list.append(transform_dict_keys(item))
-        return new_list
-    else:
-        return data
+    return '"' + name.replace('\\', '\\\\').replace('"', '\\"') + '"'
 
-def dict_to_tree(dictionary):
+class DotGraph:
     """
-    Converts a nested dictionary into a tree structure.
-    Returns a dictionary with a 'name' key and a 'children' key.
+    Directed graph which is assembled as DOT source text and rendered with the Graphviz 'dot' command.
     """
-    def add_children(node, children_dict):
-        if isinstance(children_dict, str):
-            node['children'].append({'name': children_dict})
-        else:
-            for key, value in children_dict.items():
-                child = {'name': key}
-                if isinstance(value, dict):
-                    child['children'] = []
-                    add_children(child, value)
-                else:
-                    child['children'] = []
-                    for sub_child in value:
-                        if sub_child:
-                            if isinstance(sub_child, str):
-                                child['children'].append({'name': sub_child})
-                            else:
-                                add_children(child, sub_child)
-                                if 'children' in sub_child and any(sub_child['children']):
-                                    child['children'].append(sub_child['children'])
-                if child['name'] != "children":
-                    node['children'].append(child)
-
-    tree = {'name': list(dictionary.keys())[0], 'children': []}
-    add_children(tree, list(dictionary.values())[0])
-    return tree
-
-
+    def __init__(self):
+        # DOT statements and the node names and edges they declare, filled by visualize_tree
+        self.lines = []
+        self.nodes = set()
+        self.edges = set()
+
+    def source(self):
+        return "digraph {\n" + "".join(self.lines) + "}\n"
+
+    def render(self, filename, format="png"):
+        """
+        Renders the graph to '<filename>.<format>', piping the DOT source to the 'dot' command.
+        """
+        subprocess.run(
+            ["dot", "-T" + format, "-o", f"{filename}.{format}"],
+            input=self.source(), encoding="utf-8", check=True,
+        )
 
 def visualize_tree(tree, graph=None):
     """
     Generates a visualization of a tree structure.
-    Returns a graphviz object.
-    """
-    def add_node(node, graph):
-        if 'name' in node:
-            name = node['name']
-            graph.node(name)
-            if 'children' in node:
-                for child in node['children']:
-                    if child:
-                        child_name = child['name']
-                        graph.edge(name, child_name)
-                        add_node(child, graph)
-
+    Returns a DotGraph object.
+    """
     if graph is None:
-        graph = graphviz.Digraph()
+        graph = DotGraph()
+
+    # Emit the DOT statements directly, in the same pre-order as a recursive walk.
+    # A module used by several parents is emitted once with an edge from each parent.
+    lines, nodes, edges = graph.lines, graph.nodes, graph.edges
+    stack = [(None, tree)]
+    while stack:
+        parent_name, node = stack.pop()
+        if 'name' not in node:
+            continue
+        name = node['name']
+        if parent_name is not None and (parent_name, name) not in edges:
+            edges.add((parent_name, name))
+            lines.append(f"\t{_dot_id(parent_name)} -> {_dot_id(name)}\n")
+        if name not in nodes:
+            nodes.add(name)
+            lines.append(f"\t{_dot_id(name)}\n")
+        elif parent_name is not None:
+            # The sub tree of a node with the same name has already been emitted. The root is always
+            # expanded, as several files of a folder share the folder name as root.
+            continue
+        stack.extend((name, child) for child in reversed(node.get('children', [])) if child)
 
-    add_node(tree, graph)
     return graph
 
 
 def print_dependency_tree(tree, indent=0):
     """
-    Recursively prints the dependency tree in a human-readable format.
+    Prints the dependency tree in a human-readable format.
+    The whole tree is written to the output at once.
     """
-    if isinstance(tree, str):
-        print('  ' * indent + tree)
-    else:
-        for key, value in tree.items():
-            print('  ' * indent + str(key))
-            if isinstance(value, dict):
-                if not value:
-                    print('  ' * (indent + 1) + "No further dependencies")
-                else:
-                    print_dependency_tree(value, indent + 1)
-            elif isinstance(value, list):
-                if not value:
-                    print('  ' * (indent + 1) + "No further dependencies")
-                else:
-                    for item in value:
-                        print_dependency_tree(item, indent + 1)
+    buffer = io.StringIO()
+    # Pending nodes with their indentation, in reverse output order
+    stack = [(tree, indent)]
+    while stack:
+        node, level = stack.pop()
+        buffer.write('  ' * level + node['name'] + '\n')
+        if 'children' not in node:
+            # Markers like 'ERROR DOWNLOADING' have no children of their own
+            continue
+        if not node['children']:
+            buffer.write('  ' * (level + 1) + "No further dependencies\n")
+        stack.extend((child, level + 1) for child in reversed(node['children']))
+
+    sys.stdout.write(buffer.getvalue())
 
 
 def analyze_file():
@@ -308,35 +816,71 @@ def analyze_file():
     if not os.path.isfile(file_path):
         tk.messagebox.showerror("Error", "Invalid file path: '" + file_path + "'")
         return
-    
-    dependency_tree = display_dependency_tree(file_path)
-    
-    dir_name = os.path.dirname(file_path).replace(":", "")
 
-    dependency_tree_str = transform_dict_keys(dependency_tree)
-    dependency_tree_str = {dir_name: dependency_tree_str}
-    tree = dict_to_tree(dependency_tree_str)
-    graph = visualize_tree(tree)
+    def _worker():
+        dependency_tree = display_dependency_tree(file_path)
+
+        dir_name = os.path.dirname(file_path).replace(":", "")
+        tree = {'name': dir_name, 'children': dependency_tree or []}
+        graph = visualize_tree(tree)
 
-    graph.render("dependency_tree", format="png")
+        graph.render("dependency_tree", format="png")
 
-    # Print dependency tree to console
-    print()
-    if dependency_tree:
-        print_dependency_tree({dir_name: dependency_tree})
-    else:
-        print(f"{dir_name}\n  No dependencies found")
+        # Print dependency tree to console
+        print()
+        if dependency_tree:
+            print_dependency_tree(tree)
+        else:
+            print(f"{dir_name}\n  No dependencies found")
 
-    print()
-    print("FINISHED")
+        print()
+        print("FINISHED")
+
+    run_in_background(_worker)
+
+def run_in_background(work):
+    """
+    Runs an analysis in a daemon thread, so the GUI stays responsive while dependencies are cloned.
+    The analyze buttons are disabled until the analysis finished.
+    """
+    analyze_file_button.config(state=tk.DISABLED)
+    analyze_folder_button.config(state=tk.DISABLED)
+    forget_failed_fetches()
+
+    worker = threading.Thread(target=work, daemon=True)
+    worker.start()
+    root.after(LOG_POLL_INTERVAL_MS, wait_for_worker, worker)
+
+def wait_for_worker(worker):
+    """
+    Re-enables the analyze buttons once the worker thread finished.
+    """
+    if worker.is_alive():
+        root.after(LOG_POLL_INTERVAL_MS, wait_for_worker, worker)
+        return
+
+    analyze_file_button.config(state=tk.NORMAL)
+    analyze_folder_button.config(state=tk.NORMAL)
 
 class TextRedirector(ScrolledText):
     def __init__(self, master=None, **kwargs):
         super().__init__(master, **kwargs)
+        # Text written by any thread, inserted into the widget by the Tk main thread
+        self._output = queue.SimpleQueue()
+        self.after(LOG_POLL_INTERVAL_MS, self._poll_output)
 
     def write(self, text):
-        self.insert(tk.END, text)
-        self.see(tk.END)
+        self._output.put(text)
+
+    def _poll_output(self):
+        # Insert everything written since the last poll at once, instead of redrawing on every print
+        chunks = []
+        while not self._output.empty():
+            chunks.append(self._output.get())
+        if chunks:
+            self.insert(tk.END, "".join(chunks))
+            self.see(tk.END)
+        self.after(LOG_POLL_INTERVAL_MS, self._poll_output)
 
     def flush(self):
         pass
@@ -379,4 +923,7 @@ if __name__ == '__main__':
     analyze_file_button.pack(side=tk.BOTTOM, padx=10, pady=(0, 10))
     analyze_folder_button.pack(side=tk.BOTTOM, padx=10, pady=(0, 10))
     # Run the GUI
-    root.mainloop()
\ No newline at end of file
+    root.mainloop()
+
+    # The window may be closed during an analysis, do not wait for its queued fetches before exiting
+    _CLONE_POOL.shutdown(wait=False, cancel_futures=True)
\ No newline at end of file